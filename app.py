@@ -1,123 +1,236 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, current_app, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import logging
-from task_service import task_service
-from database.database_manager import db_manager
-from config_utils import app_settings
+from werkzeug.exceptions import BadRequest
+import os
+import sys
+import orjson
+from task_service import TaskService
+from database.database_manager import BackupInProgressError
+from config_utils import AppSettings
+from logging_utils import apply_config_level, get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', handlers=[logging.FileHandler("api.log"), logging.StreamHandler()])
-logger = logging.getLogger("api")
+logger = get_logger("api")
+
+# orjson options for every response body; stats use integer priority keys
+JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, used to parse request.json"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=JSON_OPTIONS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 # Initialize app and services
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
+# One service per process, so the connection pool, statement caches and stats cache outlive requests
+app.task_service = TaskService.instance()
+app_settings = AppSettings()
+apply_config_level(app_settings.get_logging_level())
 api_config = app_settings.get_api_settings()
 
+# Read endpoints use the database's data version as a weak ETag, so every worker agrees on it
+
+def _with_etag(response, version):
+    """Attach the data version to a response as a weak ETag"""
+    if version:
+        response.set_etag(version, weak=True)
+    return response
+
+def _not_modified(version):
+    """Return a 304 response if If-None-Match already covers the current version (weak comparison, lists and *)"""
+    if version and request.if_none_match.contains_weak(version):
+        return _with_etag(Response(status=304), version)
+    return None
+
+# Constant response bodies, serialized once at import
+_TASK_NOT_FOUND = orjson.dumps({"error": "Task not found"})
+_TITLE_REQUIRED = orjson.dumps({"error": "Title is required"})
+_CREATE_FAILED = orjson.dumps({"error": "Failed to create task"})
+_TASK_LIST_REQUIRED = orjson.dumps({"error": "A non-empty list of tasks is required"})
+_TITLES_REQUIRED = orjson.dumps({"error": "Title is required for every task"})
+_BULK_CREATE_FAILED = orjson.dumps({"error": "Failed to create tasks"})
+_NO_DATA = orjson.dumps({"error": "No data provided"})
+_INVALID_JSON = orjson.dumps({"error": "Request body must be valid JSON"})
+_WRITE_TIMEOUT = orjson.dumps({"error": "The database is busy, the change was not applied"})
+_TASK_DELETED = orjson.dumps({"message": "Task deleted successfully"})
+_BACKUP_IN_PROGRESS = orjson.dumps({"error": "A database backup is already in progress"})
+_BACKUP_FAILED = orjson.dumps({"error": "Failed to create database backup"})
+
+def _raw(body, status=200):
+    """Wrap an already serialized JSON body in a response"""
+    return Response(body, status=status, mimetype='application/json')
+
+def _json(obj, status=200):
+    """Serialize obj with orjson into a JSON response"""
+    return _raw(orjson.dumps(obj, option=JSON_OPTIONS), status)
+
 @app.get('/api/tasks')
 def get_tasks():
     try:
+        args = request.args.to_dict()
+        priority = args.get("priority")
         filters = {
-            "status": request.args.get("status"),
-            "priority": int(request.args.get("priority")) if request.args.get("priority") else None,
-            "search": request.args.get("search")
+            "status": args.get("status"),
+            "priority": int(priority) if priority not in (None, "") else None,
+            "search": args.get("search")
         }
         
-        sort_by = request.args.get('sort_by', 'created_at')
-        sort_order = request.args.get('sort_order', 'DESC')
+        # Unknown sort fields and orders are coerced to the defaults by the service
+        sort_by = args.get('sort_by', 'created_at')
+        sort_order = args.get('sort_order', 'DESC')
+        # Optional comma-separated projection, e.g. fields=id,title,status
+        fields = args.get('fields')
+        fields = set(fields.split(',')) if fields else None
         
-        valid_sort_fields = ['created_at', 'updated_at', 'title', 'priority', 'status']
-        if sort_by not in valid_sort_fields:
-            sort_by = 'created_at'
-        if sort_order not in ['ASC', 'DESC']:
-            sort_order = 'DESC'
+        # Read the version before querying so a concurrent write can only make the ETag stale, never the data
+        version = current_app.task_service.get_data_version()
+        not_modified = _not_modified(version)
+        if not_modified:
+            return not_modified
         
-        tasks = task_service.get_all_tasks(filters, sort_by, sort_order)
-        return jsonify(tasks)
+        tasks = current_app.task_service.get_all_tasks(filters, sort_by, sort_order, fields)
+        return _with_etag(_json(tasks), version)
     except Exception as e:
         logger.error(f"Error in get_tasks: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+        return _json({"error": f"An unexpected error occurred: {str(e)}"}, 500)
 
 @app.get('/api/tasks/<task_id>')
 def get_task(task_id):
     try:
-        task = task_service.get_task_by_id(task_id)
-        return jsonify(task) if task else (jsonify({"error": "Task not found"}), 404)
+        task = current_app.task_service.get_task_by_id(task_id)
+        return _json(task) if task else _raw(_TASK_NOT_FOUND, 404)
     except Exception as e:
         logger.error(f"Error in get_task: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+        return _json({"error": f"An unexpected error occurred: {str(e)}"}, 500)
 
 @app.post('/api/tasks')
 def create_task():
     try:
         task_data = request.json
         if not task_data or not task_data.get('title'):
-            return jsonify({"error": "Title is required"}), 400
+            return _raw(_TITLE_REQUIRED, 400)
         
-        created_task = task_service.create_task(task_data)
-        return jsonify(created_task), 201 if created_task else (jsonify({"error": "Failed to create task"}), 500)
+        created_task = current_app.task_service.create_task(task_data)
+        return _json(created_task, 201) if created_task else _raw(_CREATE_FAILED, 500)
+    except BadRequest:
+        return _raw(_INVALID_JSON, 400)
+    except TimeoutError:
+        return _raw(_WRITE_TIMEOUT, 503)
     except Exception as e:
         logger.error(f"Error in create_task: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+        return _json({"error": f"An unexpected error occurred: {str(e)}"}, 500)
+
+@app.post('/api/tasks/bulk')
+def bulk_create_tasks():
+    try:
+        tasks_data = request.json
+        if not isinstance(tasks_data, list) or not tasks_data:
+            return _raw(_TASK_LIST_REQUIRED, 400)
+        if not all(isinstance(task_data, dict) and task_data.get('title') for task_data in tasks_data):
+            return _raw(_TITLES_REQUIRED, 400)
+        
+        created_tasks = current_app.task_service.bulk_create(tasks_data)
+        if not created_tasks:
+            return _raw(_BULK_CREATE_FAILED, 500)
+        return _json(created_tasks, 201)
+    except BadRequest:
+        return _raw(_INVALID_JSON, 400)
+    except Exception as e:
+        logger.error(f"Error in bulk_create_tasks: {e}")
+        return _json({"error": f"An unexpected error occurred: {str(e)}"}, 500)
 
 @app.put('/api/tasks/<task_id>')
 def update_task(task_id):
     try:
         task_data = request.json
         if not task_data:
-            return jsonify({"error": "No data provided"}), 400
+            return _raw(_NO_DATA, 400)
         
-        updated_task = task_service.update_task(task_id, task_data)
-        return jsonify(updated_task) if updated_task else (jsonify({"error": "Task not found"}), 404)
+        updated_task = current_app.task_service.update_task(task_id, task_data)
+        return _json(updated_task) if updated_task else _raw(_TASK_NOT_FOUND, 404)
+    except BadRequest:
+        return _raw(_INVALID_JSON, 400)
+    except TimeoutError:
+        return _raw(_WRITE_TIMEOUT, 503)
     except Exception as e:
         logger.error(f"Error in update_task: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+        return _json({"error": f"An unexpected error occurred: {str(e)}"}, 500)
 
 @app.delete('/api/tasks/<task_id>')
 def delete_task(task_id):
     try:
-        return jsonify({"message": "Task deleted successfully"}) if task_service.delete_task(task_id) else (jsonify({"error": "Task not found"}), 404)
+        if not current_app.task_service.delete_task(task_id):
+            return _raw(_TASK_NOT_FOUND, 404)
+        return _raw(_TASK_DELETED)
     except Exception as e:
         logger.error(f"Error in delete_task: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+        return _json({"error": f"An unexpected error occurred: {str(e)}"}, 500)
 
 @app.get('/api/stats')
 def get_stats():
     try:
-        return jsonify(task_service.get_task_stats())
+        # Read the version once, for both the ETag and the stats cache lookup
+        version = current_app.task_service.get_data_version()
+        not_modified = _not_modified(version)
+        if not_modified:
+            return not_modified
+        
+        return _with_etag(_json(current_app.task_service.get_task_stats(version)), version)
     except Exception as e:
         logger.error(f"Error in get_stats: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+        return _json({"error": f"An unexpected error occurred: {str(e)}"}, 500)
 
 @app.get('/api/system/info')
 def get_system_info():
     try:
         safe_config = {key: api_config[key] for key in ("host", "port", "cors_enabled") if key in api_config}
-        return jsonify({
-            "database": db_manager.get_table_info(),
+        return _json({
+            "database": current_app.task_service.db_manager.get_table_info(),
             "config": safe_config,
             "api_version": "1.0.0"
         })
     except Exception as e:
         logger.error(f"Error in get_system_info: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+        return _json({"error": f"An unexpected error occurred: {str(e)}"}, 500)
 
 @app.post('/api/system/backup')
 def create_backup():
     try:
-        if db_manager.backup_database():
-            app_settings.update_last_backup_time()
-            return jsonify({"message": "Database backup created successfully"})
-        return jsonify({"error": "Failed to create database backup"}), 500
+        db_manager = current_app.task_service.db_manager
+        if db_manager.backup_database(background=True, on_complete=app_settings.update_last_backup_time):
+            return _json({"message": "Database backup started", "path": db_manager.backup_status["path"]}, 202)
+        return _raw(_BACKUP_FAILED, 500)
+    except BackupInProgressError:
+        return _raw(_BACKUP_IN_PROGRESS, 409)
     except Exception as e:
         logger.error(f"Error in create_backup: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+        return _json({"error": f"An unexpected error occurred: {str(e)}"}, 500)
 
 if __name__ == '__main__':
     if app_settings.should_backup_database():
         logger.info("Performing scheduled database backup")
-        if db_manager.backup_database():
+        if app.task_service.db_manager.backup_database():
             app_settings.update_last_backup_time()
     
-    logger.info(f"Starting API server on {api_config.get('host', 'localhost')}:{api_config.get('port', 5000)}")
-    app.run(debug=api_config.get("debug", False), host=api_config.get("host", "localhost"), port=api_config.get("port", 5000))
\ No newline at end of file
+    # exec() below skips atexit handlers, so persist pending config changes first
+    app_settings.config_manager.flush()
+    
+    host, port = api_config.get("host", "localhost"), api_config.get("port", 5000)
+    logger.info(f"Starting API server on {host}:{port}")
+    if api_config.get("debug", False):
+        app.run(debug=True, host=host, port=port)
+    else:
+        # Hand the process over to gunicorn with gevent workers for concurrent request handling
+        os.execv(sys.executable, [
+            sys.executable, "-m", "gunicorn",
+            "-k", "gevent",
+            "-w", str(api_config.get("workers", 1)),
+            "--worker-connections", str(api_config.get("worker_connections", 1000)),
+            "--bind", f"{host}:{port}",
+            "wsgi:app"
+        ])
\ No newline at end of file
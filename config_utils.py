@@ -2,19 +2,14 @@
 
 import os
 import json
+import time
+import atexit
 import logging
+import threading
 from datetime import datetime
+from logging_utils import get_logger
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("config.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger("config_utils")
+logger = get_logger("config_utils")
 
 # Default configuration
 DEFAULT_CONFIG = {
@@ -29,10 +24,12 @@ DEFAULT_CONFIG = {
         "port": 5000,
         "debug": False,
         "cors_enabled": True,
-        "rate_limit": 100  # requests per minute
+        "rate_limit": 100,  # requests per minute
+        "workers": 1,  # gunicorn worker processes
+        "worker_connections": 1000  # concurrent greenlets per worker
     },
     "logging": {
-        "level": "INFO",
+        "level": "WARNING",
         "file_enabled": True,
         "console_enabled": True,
         "max_file_size": 10485760,  # 10MB
@@ -41,6 +38,8 @@ DEFAULT_CONFIG = {
 }
 
 CONFIG_FILE_PATH = "config.json"
+# Seconds between background writes of pending configuration changes
+CONFIG_FLUSH_INTERVAL = 5
 
 class ConfigManager:
     _instance = None
@@ -49,9 +48,22 @@ class ConfigManager:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ConfigManager, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._dirty = False
             cls._instance._load_config()
+            cls._instance._start_flusher()
         return cls._instance
     
+    def _start_flusher(self):
+        """Write pending changes periodically in the background and once more at exit"""
+        def run():
+            while True:
+                time.sleep(CONFIG_FLUSH_INTERVAL)
+                self.flush()
+        
+        threading.Thread(target=run, name="config-flusher", daemon=True).start()
+        atexit.register(self.flush)
+    
     def _load_config(self):
         """Load configuration from file or create with defaults"""
         if os.path.exists(CONFIG_FILE_PATH):
@@ -77,6 +89,20 @@ class ConfigManager:
         except Exception as e:
             logger.error(f"Error saving configuration: {e}")
     
+    def flush(self):
+        """
+        Write the configuration to file if it has unsaved changes
+        
+        Returns:
+            bool: True if the file was written
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            self._save_config()
+            self._dirty = False
+            return True
+    
     def get_config(self):
         """Get the entire configuration"""
         return self._config
@@ -112,11 +138,12 @@ class ConfigManager:
         Returns:
             bool: Success status
         """
-        if section not in self._config:
-            self._config[section] = {}
-        
-        self._config[section][key] = value
-        self._save_config()
+        with self._lock:
+            if section not in self._config:
+                self._config[section] = {}
+            
+            self._config[section][key] = value
+            self._dirty = True
         return True
     
     def update_section(self, section, values):
@@ -133,23 +160,38 @@ class ConfigManager:
         if not isinstance(values, dict):
             return False
         
-        if section not in self._config:
-            self._config[section] = {}
-        
-        self._config[section].update(values)
-        self._save_config()
+        with self._lock:
+            if section not in self._config:
+                self._config[section] = {}
+            
+            self._config[section].update(values)
+            self._dirty = True
         return True
     
     def reset_to_defaults(self):
         """Reset configuration to defaults"""
-        self._config = DEFAULT_CONFIG.copy()
-        self._save_config()
+        with self._lock:
+            self._config = DEFAULT_CONFIG.copy()
+            self._dirty = True
         logger.info("Configuration reset to defaults")
         return True
 
 class AppSettings:
     def __init__(self):
         self.config_manager = ConfigManager()
+        self._last_backup_epoch = self._parse_last_backup()
+    
+    def _parse_last_backup(self):
+        """Parse the stored last backup time into a unix timestamp (0.0 if never backed up)"""
+        last_backup = self.config_manager.get("database", "last_backup")
+        if last_backup is None:
+            return 0.0
+        
+        try:
+            return datetime.fromisoformat(last_backup).timestamp()
+        except Exception as e:
+            logger.error(f"Error parsing last backup time: {e}")
+            return 0.0
     
     def get_database_path(self):
         """Get the database path setting"""
@@ -169,7 +211,7 @@ class AppSettings:
             "ERROR": logging.ERROR,
             "CRITICAL": logging.CRITICAL
         }
-        return level_map.get(level_str, logging.INFO)
+        return level_map.get(level_str, logging.WARNING)
     
     def should_backup_database(self):
         """
@@ -184,25 +226,15 @@ class AppSettings:
             return False
         
         backup_interval = self.config_manager.get("database", "backup_interval")
-        last_backup = self.config_manager.get("database", "last_backup")
-        
-        # If never backed up, do it
-        if last_backup is None:
-            return True
         
-        # Check if interval has elapsed
-        try:
-            last_backup_time = datetime.fromisoformat(last_backup)
-            elapsed = (datetime.now() - last_backup_time).total_seconds()
-            return elapsed >= backup_interval
-        except Exception as e:
-            logger.error(f"Error checking backup time: {e}")
-            return True
+        # Never backed up (or unparseable) is stored as 0.0, so it is always due
+        return (time.time() - self._last_backup_epoch) >= backup_interval
     
     def update_last_backup_time(self):
         """Update the last backup timestamp"""
-        now = datetime.now().isoformat()
-        self.config_manager.set("database", "last_backup", now)
+        now = time.time()
+        self._last_backup_epoch = now
+        self.config_manager.set("database", "last_backup", datetime.fromtimestamp(now).isoformat())
         return True
     
 if __name__ == "main":
@@ -2,36 +2,97 @@
 
 import sqlite3
 import os
-import logging
+import queue
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from logging_utils import get_logger
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("database.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger("database_manager")
+logger = get_logger("database_manager")
+
+def fetch_dicts(cursor, fetch_all=True, cols=None):
+    """
+    Fetch rows from an executed cursor as plain dictionaries
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor that has already executed a statement
+        fetch_all (bool): Fetch every row, or only the first one
+        cols (tuple, optional): Column names, read from the cursor description if omitted
+        
+    Returns:
+        list or dict: List of row dicts, or a single row dict (None if no row)
+    """
+    if cursor.description is None:  # Statement produced no result set
+        return [] if fetch_all else None
+    
+    if cols is None:
+        cols = tuple(d[0] for d in cursor.description)
+    if fetch_all:
+        return [dict(zip(cols, row)) for row in cursor.fetchall()]
+    
+    row = cursor.fetchone()
+    return dict(zip(cols, row)) if row else None
+
+# SQL expression for the current local time, in the same ISO format the service writes
+SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+# Current data version; epoch is random per database file so versions never repeat across files
+DATA_VERSION_QUERY = "SELECT epoch, version FROM data_version WHERE id = 1"
+
+# Tables reported by get_table_info: skips SQLite's own tables, the full-text index
+# with its shadow tables, and the data version bookkeeping row
+TABLE_NAMES_QUERY = """
+SELECT name FROM sqlite_master
+WHERE type = 'table'
+AND name NOT LIKE 'sqlite_%'
+AND name NOT LIKE 'tasks_fts%'
+AND name != 'data_version'
+"""
+
+# Number of persistent read connections kept open per DatabaseManager
+DEFAULT_POOL_SIZE = 5
+# Milliseconds a connection waits on a locked database before failing
+BUSY_TIMEOUT_MS = 30000
+# Prepared statements cached per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+class BackupInProgressError(Exception):
+    """Raised when a backup is requested while another one is still running"""
 
 class DatabaseManager:
-    def __init__(self, db_path='database/tasks.db'):
+    def __init__(self, db_path='database/tasks.db', pool_size=DEFAULT_POOL_SIZE):
         """Initialize the database manager with the specified database path"""
         self.db_path = db_path
+        self._pool = queue.Queue(maxsize=pool_size)
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._backup_lock = threading.Lock()
+        self.backup_status = {"state": "idle", "path": None, "remaining": 0, "total": 0}
+        # Result column names per read query text; the schema is fixed once the database is open
+        self._columns = {}
         self._ensure_database_exists()
     
     def _ensure_database_exists(self):
-        """Ensure that the database directory and table exist"""
+        """Ensure that the database directory and table exist and open the connections"""
         db_dir = os.path.dirname(self.db_path)
-        if not os.path.exists(db_dir):
+        if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir)
             logger.info(f"Created database directory: {db_dir}")
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        self._writer = self._connect()
+        for _ in range(self._pool.maxsize):
+            self._pool.put(self._connect())
         
+        with self._borrow_writer() as conn:
+            # WAL is persistent in the database file, so it only needs to be set once
+            journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            if journal_mode.lower() != 'wal':
+                logger.warning(f"Could not enable WAL mode, journal mode is: {journal_mode}")
+            self._create_schema(conn.cursor())
+        logger.info("Database initialized with required tables and indexes")
+    
+    def _create_schema(self, cursor):
+        """Create the tasks table and its indexes if they do not exist"""
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS tasks (
             id TEXT PRIMARY KEY,
@@ -44,46 +105,244 @@ class DatabaseManager:
         )
         ''')
         
-        # Create index on commonly filtered fields
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_status ON tasks (status)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_priority ON tasks (priority)')
+        indexes_before = self._index_names(cursor)
+        
+        # Create indexes matching the filter + default sort of the list query. The composite
+        # indexes replace the former single-column idx_status/idx_priority, which are their prefixes.
+        cursor.execute('DROP INDEX IF EXISTS idx_status')
+        cursor.execute('DROP INDEX IF EXISTS idx_priority')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_priority_created ON tasks (priority, created_at DESC)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON tasks (created_at)')
         
-        conn.commit()
-        conn.close()
-        logger.info("Database initialized with required tables and indexes")
+        # Covering index for the filtered list query (WHERE status AND priority ORDER BY created_at)
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_cover
+        ON tasks (status, priority, created_at DESC, id, title, updated_at)
+        ''')
+        
+        self._create_search_index(cursor)
+        self._create_version_table(cursor)
+        
+        # Full ANALYZE scans every index, so only run it when there are no planner statistics
+        # yet or the index set just changed; otherwise let SQLite refresh what it deems stale
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'")
+        if cursor.fetchone() is None or self._index_names(cursor) != indexes_before:
+            cursor.execute('ANALYZE')
+        else:
+            cursor.execute('PRAGMA optimize')
+    
+    def _index_names(self, cursor):
+        """Names of the indexes on the tasks table"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='tasks'")
+        return {row[0] for row in cursor.fetchall()}
+    
+    def _create_search_index(self, cursor):
+        """Create the full-text index over task titles and descriptions, kept in sync by triggers"""
+        # The index is an external-content table keyed on tasks' implicit rowid, because
+        # the primary key is a TEXT id. VACUUM may renumber implicit rowids, which would
+        # silently desync the index and make the triggers delete the wrong entries, so
+        # never VACUUM this database without rebuilding the index straight after:
+        #     INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='tasks_fts'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts
+        USING fts5(title, description, content='tasks', content_rowid='rowid')
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description);
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.rowid, old.title, old.description);
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.rowid, old.title, old.description);
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description);
+        END
+        ''')
+        
+        # Index rows that were created before the full-text table existed
+        if not exists:
+            cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
     
-    def get_connection(self):
-        """Get a database connection with row factory enabled"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def _create_version_table(self, cursor):
+        """Create the single-row data version, bumped by triggers on every change to tasks"""
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            epoch TEXT NOT NULL,
+            version INTEGER NOT NULL
+        )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO data_version (id, epoch, version) VALUES (1, lower(hex(randomblob(8))), 0)")
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS data_version_{event.lower()} AFTER {event} ON tasks BEGIN
+                UPDATE data_version SET version = version + 1 WHERE id = 1;
+            END
+            ''')
+    
+    def data_version(self):
+        """
+        Get the version of the task data, shared by every process using this database file
+        
+        Returns:
+            str: Opaque version that changes whenever any task is inserted, updated or deleted
+        """
+        row = self.query_one(DATA_VERSION_QUERY)
+        return f"{row['epoch']}-{row['version']}"
+    
+    def _connect(self):
+        """Open a pooled connection in autocommit mode returning plain tuple rows"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        # Per-connection tuning; safe to relax synchronous once the database is in WAL mode
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped I/O
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
         return conn
     
-    def execute_query(self, query, params=(), fetch_all=True, commit=False):
-        """Execute a database query and optionally fetch results or commit changes"""
+    @contextmanager
+    def _borrow(self):
+        """Borrow a read connection from the pool, returning it when done"""
+        conn = self._pool.get()
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, params)
+            yield conn
+        finally:
+            self._pool.put(conn)
+    
+    @contextmanager
+    def _borrow_writer(self):
+        """Hold the single write connection; SQLite allows one writer at a time anyway"""
+        with self._write_lock:
+            yield self._writer
+    
+    @contextmanager
+    def transaction(self):
+        """Hold the write connection inside a transaction that commits on success and rolls back on error"""
+        with self._borrow_writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                # The error may already have rolled the transaction back
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            try:
+                conn.execute("COMMIT")
+            except BaseException:
+                # A failed COMMIT (disk full, I/O error) can leave the transaction open,
+                # which would make every later BEGIN on this connection fail
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+    
+    def warm_statements(self, statements):
+        """
+        Run each read statement once on every pooled connection so its prepared
+        statement is already in that connection's statement cache
+        
+        Args:
+            statements (iterable): (query, params) pairs; params should match few or no rows
+        """
+        statements = list(statements)
+        conns = [self._pool.get() for _ in range(self._pool.maxsize)]
+        try:
+            for conn in conns:
+                for query, params in statements:
+                    # A failing statement only skips itself, not the rest of the warmup
+                    try:
+                        conn.execute(query, params).close()
+                    except sqlite3.Error as e:
+                        logger.warning(f"Statement warmup failed for {query!r}: {e}")
+        finally:
+            for conn in conns:
+                self._pool.put(conn)
+    
+    def _result_columns(self, query, cursor):
+        """Column names for a read query's result set, computed once per query text"""
+        cols = self._columns.get(query)
+        if cols is None and cursor.description is not None:
+            cols = self._columns[query] = tuple(d[0] for d in cursor.description)
+        return cols
+    
+    def query_all(self, query, params=()):
+        """Execute a read query and return every row as a dict"""
+        try:
+            with self._borrow() as conn:
+                cursor = conn.execute(query, params)
+                return fetch_dicts(cursor, cols=self._result_columns(query, cursor))
+        except sqlite3.Error as e:
+            logger.error(f"Database error: {e}")
+            raise
+    
+    def query_one(self, query, params=()):
+        """Execute a read query and return the first row as a dict, or None"""
+        try:
+            with self._borrow() as conn:
+                cursor = conn.execute(query, params)
+                return fetch_dicts(cursor, fetch_all=False, cols=self._result_columns(query, cursor))
+        except sqlite3.Error as e:
+            logger.error(f"Database error: {e}")
+            raise
+    
+    def execute(self, query, params=()):
+        """Execute a write statement (committed immediately in autocommit mode) and return the affected row count"""
+        try:
+            with self._borrow_writer() as conn:
+                return conn.execute(query, params).rowcount
+        except sqlite3.Error as e:
+            logger.error(f"Database error: {e}")
+            raise
+    
+    def execute_many(self, query, seq_of_params):
+        """
+        Execute a statement for every parameter set in a single transaction
+        
+        Args:
+            query (str): SQL statement
+            seq_of_params (iterable): Parameter tuples, one per execution
             
-            result = None
-            if fetch_all:
-                result = cursor.fetchall()
-            elif not commit:  # If not fetching all and not committing, fetch one
-                result = cursor.fetchone()
-                
-            if commit:
-                conn.commit()
-                
-            return result
+        Returns:
+            int: Number of rows affected
+        """
+        try:
+            with self.transaction() as conn:
+                return conn.executemany(query, seq_of_params).rowcount
         except sqlite3.Error as e:
             logger.error(f"Database error: {e}")
             raise
-        finally:
-            conn.close()
     
-    def backup_database(self, backup_path=None):
-        """Create a backup of the database"""
+    def backup_database(self, backup_path=None, background=False, on_complete=None):
+        """
+        Create a backup of the database
+        
+        Args:
+            backup_path (str, optional): Destination file, timestamped by default
+            background (bool): Run the copy in a background thread and return immediately
+            on_complete (callable, optional): Called without arguments after a successful backup
+            
+        Returns:
+            bool: Whether the backup succeeded, or was started when running in the background
+            
+        Raises:
+            BackupInProgressError: Another backup is still running
+        """
         if backup_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = f"database/backup_{timestamp}.db"
@@ -96,6 +355,21 @@ class DatabaseManager:
         if not os.path.exists(backup_dir):
             os.makedirs(backup_dir)
         
+        if not self._backup_lock.acquire(blocking=False):
+            logger.warning("Cannot backup - another backup is already in progress")
+            raise BackupInProgressError(self.backup_status["path"])
+        
+        self.backup_status = {"state": "running", "path": backup_path, "remaining": 0, "total": 0}
+        if background:
+            threading.Thread(target=self._do_backup, args=(backup_path, on_complete), daemon=True).start()
+            return True
+        return self._do_backup(backup_path, on_complete)
+    
+    def _do_backup(self, backup_path, on_complete=None):
+        """Copy the database in a single step, releasing the backup lock when done"""
+        def progress(status, remaining, total):
+            self.backup_status.update(remaining=remaining, total=total)
+        
         try:
             # Open the source database
             source_conn = sqlite3.connect(self.db_path)
@@ -103,46 +377,55 @@ class DatabaseManager:
             # Create a new backup database
             backup_conn = sqlite3.connect(backup_path)
             
-            # Copy data from source to backup
-            source_conn.backup(backup_conn)
-            
-            # Close connections
-            source_conn.close()
-            backup_conn.close()
+            try:
+                # Copy every page in one step. A stepped copy restarts whenever the writer
+                # connection changes the source, so it may never finish under steady writes;
+                # in WAL mode this read does not block the writer.
+                source_conn.backup(backup_conn, pages=-1, progress=progress)
+            finally:
+                # Close connections
+                source_conn.close()
+                backup_conn.close()
             
+            self.backup_status["state"] = "completed"
             logger.info(f"Database backed up successfully to {backup_path}")
-            return True
         except sqlite3.Error as e:
+            self.backup_status["state"] = "failed"
             logger.error(f"Backup failed: {e}")
             return False
+        finally:
+            self._backup_lock.release()
+        
+        if on_complete:
+            on_complete()
+        return True
     
     def get_table_info(self):
         """Get information about database tables"""
         tables = {}
         
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Get list of tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            table_names = [row['name'] for row in cursor.fetchall()]
-            
-            for table_name in table_names:
-                # Get column info
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = cursor.fetchall()
+            with self._borrow() as conn:
+                cursor = conn.cursor()
                 
-                # Get row count
-                cursor.execute(f"SELECT COUNT(*) as count FROM {table_name}")
-                row_count = cursor.fetchone()['count']
+                # Get list of tables
+                cursor.execute(TABLE_NAMES_QUERY)
+                table_names = [row['name'] for row in fetch_dicts(cursor)]
                 
-                tables[table_name] = {
-                    'columns': [dict(col) for col in columns],
-                    'row_count': row_count
-                }
+                for table_name in table_names:
+                    # Get column info
+                    cursor.execute(f"PRAGMA table_info({table_name})")
+                    columns = fetch_dicts(cursor)
+                    
+                    # Get row count
+                    cursor.execute(f"SELECT COUNT(*) as count FROM {table_name}")
+                    row_count = fetch_dicts(cursor, fetch_all=False)['count']
+                    
+                    tables[table_name] = {
+                        'columns': columns,
+                        'row_count': row_count
+                    }
             
-            conn.close()
             return tables
         except sqlite3.Error as e:
             logger.error(f"Error getting table info: {e}")
@@ -2,6 +2,7 @@
 
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 from datetime import datetime
 import json
@@ -13,9 +14,19 @@ st.set_page_config(
     layout="wide"
 )
 
+# Shared HTTP session so keep-alive connections to the API are reused across calls.
+# Cached as a resource because Streamlit re-executes this script on every interaction.
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+    return session
+
+SESSION = get_session()
+
 # Helper functions
-def get_all_tasks():
-    response = requests.get("http://localhost:5000/api/tasks")
+def get_all_tasks(params: dict = None):
+    response = SESSION.get("http://localhost:5000/api/tasks", params=params)
     if response.status_code == 200:
         return response.json()
     else:
@@ -23,7 +34,7 @@ def get_all_tasks():
         return []
 
 def get_task(task_id):
-    response = requests.get(f"http://localhost:5000/api/tasks/{task_id}")
+    response = SESSION.get(f"http://localhost:5000/api/tasks/{task_id}")
     if response.status_code == 200:
         return response.json()
     else:
@@ -31,7 +42,7 @@ def get_task(task_id):
         return None
 
 def create_task(task_data):
-    response = requests.post("http://localhost:5000/api/tasks", json=task_data)
+    response = SESSION.post("http://localhost:5000/api/tasks", json=task_data)
     if response.status_code == 201:
         st.success("Task created successfully!")
         return response.json()
@@ -40,7 +51,7 @@ def create_task(task_data):
         return None
 
 def update_task(task_id, task_data):
-    response = requests.put(f"http://localhost:5000/api/tasks/{task_id}", json=task_data)
+    response = SESSION.put(f"http://localhost:5000/api/tasks/{task_id}", json=task_data)
     if response.status_code == 200:
         st.success("Task updated successfully!")
         return response.json()
@@ -49,7 +60,7 @@ def update_task(task_id, task_data):
         return None
 
 def delete_task(task_id):
-    response = requests.delete("http://localhost:5000/api/tasks/{task_id}")
+    response = SESSION.delete(f"http://localhost:5000/api/tasks/{task_id}")
     if response.status_code == 200:
         st.success("Task deleted successfully!")
         return True
@@ -58,13 +69,18 @@ def delete_task(task_id):
         return False
 
 def get_stats():
-    response = requests.get("http://localhost:5000/api/stats")
+    response = SESSION.get("http://localhost:5000/api/stats")
     if response.status_code == 200:
         return response.json()
     else:
         st.error(f"Failed to fetch stats: {response.text}")
         return {"total": 0, "by_status": {}, "by_priority": {}}
 
+@st.cache_data(ttl=2)
+def build_count_frame(counts, label):
+    """Build a Count column indexed by label from a {label: count} mapping"""
+    return pd.Series(counts, name="Count", dtype="int64").rename_axis(label).to_frame()
+
 # UI Components
 def display_header():
     st.title("📋 Task Manager Application")
@@ -82,11 +98,7 @@ def display_dashboard():
         status_data = stats["by_status"]
         st.subheader("Tasks by Status")
         if status_data:
-            status_df = pd.DataFrame({
-                "Status": list(status_data.keys()),
-                "Count": list(status_data.values())
-            })
-            st.bar_chart(status_df.set_index("Status"))
+            st.bar_chart(build_count_frame(status_data, "Status"))
         else:
             st.info("No status data available")
     
@@ -94,11 +106,8 @@ def display_dashboard():
         priority_data = stats["by_priority"]
         st.subheader("Tasks by Priority")
         if priority_data:
-            priority_df = pd.DataFrame({
-                "Priority": [str(k) for k in priority_data.keys()],
-                "Count": list(priority_data.values())
-            })
-            st.bar_chart(priority_df.set_index("Priority"))
+            # JSON object keys are already strings, so priorities chart as categories
+            st.bar_chart(build_count_frame(priority_data, "Priority"))
         else:
             st.info("No priority data available")
 
@@ -136,14 +145,13 @@ def display_tasks():
     with col2:
         priority_filter = st.selectbox("Filter by Priority", ["All", "1", "2", "3", "4", "5"])
     
-    # Get tasks
-    tasks = get_all_tasks()
-    
-    # Apply filters
+    # Get tasks, letting the API apply the filters
+    params = {}
     if status_filter != "All":
-        tasks = [task for task in tasks if task["status"] == status_filter]
+        params["status"] = status_filter
     if priority_filter != "All":
-        tasks = [task for task in tasks if str(task["priority"]) == priority_filter]
+        params["priority"] = priority_filter
+    tasks = get_all_tasks(params)
     
     # Display tasks
     if not tasks:
@@ -0,0 +1,68 @@
+# logging_utils.py - Centralized logging setup for the application
+
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FILE_PATH = "tasks.log"
+LOG_LEVEL_ENV = "LOG_LEVEL"
+DEFAULT_LOG_LEVEL = logging.WARNING
+
+_listener = None
+
+def _env_log_level():
+    """Read the log level name from the environment, or None if it is unset or unknown"""
+    level = logging.getLevelName(os.environ.get(LOG_LEVEL_ENV, "").strip().upper())
+    return level if isinstance(level, int) else None
+
+def setup_logging(level=None):
+    """
+    Configure the root logger once for the whole process
+    
+    Records are put on an in-memory queue and written to the log file and
+    console by a background listener thread, so logging never blocks the
+    caller on file I/O.
+    
+    Args:
+        level (int, optional): Root logger level, defaults to the LOG_LEVEL
+            environment variable or WARNING
+    """
+    global _listener
+    if _listener is not None:
+        return
+    
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = logging.FileHandler(LOG_FILE_PATH)
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    if level is None:
+        level = _env_log_level()
+    root.setLevel(level if level is not None else DEFAULT_LOG_LEVEL)
+    root.addHandler(QueueHandler(log_queue))
+    
+    _listener = QueueListener(log_queue, file_handler, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+def apply_config_level(level):
+    """
+    Use the level from the application config, unless the LOG_LEVEL environment variable overrides it
+    
+    Args:
+        level (int): Configured root logger level
+    """
+    setup_logging()
+    if _env_log_level() is None:
+        logging.getLogger().setLevel(level)
+
+def get_logger(name):
+    """Get a named logger, configuring logging on first use"""
+    setup_logging()
+    return logging.getLogger(name)
@@ -1,26 +1,133 @@
 # task_service.py - Business logic for task management
 
+import time
 import uuid
-from datetime import datetime
-import logging
-from database.database_manager import DatabaseManager
+import threading
+from functools import lru_cache
+from itertools import combinations
+from database.database_manager import DatabaseManager, DEFAULT_POOL_SIZE, BUSY_TIMEOUT_MS, SQL_NOW
+from write_batcher import WriteBatcher
+from logging_utils import get_logger
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("tasks.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger("task_service")
+logger = get_logger("task_service")
+
+# Seconds to wait for a batched write to be committed. Longer than the writer's busy
+# timeout, so a write is only abandoned (and cancelled, if not yet started) once
+# SQLite itself would have given up waiting for the lock
+WRITE_TIMEOUT = BUSY_TIMEOUT_MS / 1000 + 5
+# Seconds a computed stats result is served before it is recomputed
+STATS_TTL = 1.0
+
+# Constant SQL text is reused verbatim on every call so that sqlite3's
+# per-connection statement cache skips re-parsing and re-planning
+GET_TASK_QUERY = "SELECT * FROM tasks WHERE id = ?"
+
+# Task columns in table order, also the whitelist for list projections
+TASK_COLUMNS = ('id', 'title', 'description', 'status', 'priority', 'created_at', 'updated_at')
+
+# Parameters are bound in TASK_COLUMNS order
+INSERT_TASK_QUERY = f'''
+INSERT INTO tasks ({', '.join(TASK_COLUMNS)})
+VALUES ({', '.join('?' * len(TASK_COLUMNS))})
+'''
+
+DELETE_TASK_QUERY = "DELETE FROM tasks WHERE id = ?"
+
+# All stats in one round-trip; each row is tagged with the aggregate it belongs to
+TASK_STATS_QUERY = """
+SELECT 'total' as kind, NULL as key, COUNT(*) as count, AVG(priority) as avg_priority
+FROM tasks
+UNION ALL
+SELECT 'status', status, COUNT(*), NULL
+FROM tasks
+GROUP BY status
+UNION ALL
+SELECT 'priority', priority, COUNT(*), NULL
+FROM tasks
+GROUP BY priority
+ORDER BY kind, key
+"""
+
+# Explicit column list for RETURNING, so the response shape does not follow schema changes
+TASK_RETURNING = ', '.join(TASK_COLUMNS)
+
+# Only these identifiers may be interpolated into ORDER BY
+ALLOWED_SORT_FIELDS = frozenset({'created_at', 'updated_at', 'title', 'priority', 'status'})
+ALLOWED_SORT_ORDERS = frozenset({'ASC', 'DESC'})
+
+# WHERE conditions for each list filter, joined in the order filters are applied
+LIST_FILTER_CONDITIONS = {
+    'status': "status = ?",
+    'priority': "priority = ?",
+    'search': "rowid IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)"
+}
+
+# Parameters that match nothing, used to prepare each filter variant at startup
+WARMUP_FILTER_PARAMS = {'status': None, 'priority': None, 'search': '""'}
+# Sort fields served from an index; an unfiltered sort on any other field would scan and sort the table
+INDEXED_SORT_FIELDS = frozenset({'created_at', 'priority', 'status'})
+
+@lru_cache(maxsize=128)
+def _build_list_query(filter_keys, sort_by, sort_order, fields=None):
+    """Build the list query for a filter/sort/projection combination, always returning the same string for it"""
+    query = f"SELECT {', '.join(fields) if fields else '*'} FROM tasks"
+    if filter_keys:
+        query += " WHERE " + " AND ".join(LIST_FILTER_CONDITIONS[key] for key in filter_keys)
+    return query + f" ORDER BY {sort_by} {sort_order}"
+
+def _warmup_statements():
+    """Yield a (query, params) pair for every list query variant that is cheap to run with no-match params"""
+    yield GET_TASK_QUERY, (None,)
+    filters = tuple(LIST_FILTER_CONDITIONS)
+    for count in range(len(filters) + 1):
+        for filter_keys in combinations(filters, count):
+            params = tuple(WARMUP_FILTER_PARAMS[key] for key in filter_keys)
+            for sort_by in ALLOWED_SORT_FIELDS:
+                if not filter_keys and sort_by not in INDEXED_SORT_FIELDS:
+                    continue
+                for sort_order in ALLOWED_SORT_ORDERS:
+                    yield _build_list_query(filter_keys, sort_by, sort_order), params
+
+def _timestamp():
+    """Current local time as an ISO string with milliseconds, matching SQL_NOW"""
+    now = time.time()
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now)) + '.%03d' % (now % 1 * 1000)
+
+def _fts_query(search):
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    return ' '.join('"' + term.replace('"', '""') + '"*' for term in search.split())
 
 class TaskService:
-    def __init__(self):
-        self.db_manager = DatabaseManager()
+    _instance = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def instance(cls):
+        """Get the process-wide TaskService, creating it on first use"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
     
-    def get_all_tasks(self, filters=None, sort_by='created_at', sort_order='DESC'):
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.db_manager = DatabaseManager(pool_size=pool_size)
+        self.write_batcher = WriteBatcher(self.db_manager)
+        # (computed_at, data_version, stats), cleared by every successful write in this process;
+        # the data version also catches writes made by other worker processes
+        self._stats_cache = None
+        self._stats_ttl = STATS_TTL
+        self._stats_lock = threading.Lock()
+        self._stats_pending = None
+        # Prepare the common read statements on every connection up front
+        self.db_manager.warm_statements(_warmup_statements())
+    
+    def _invalidate_stats(self):
+        """Drop cached stats, including a computation already in flight"""
+        self._stats_cache = None
+        self._stats_pending = None
+    
+    def get_all_tasks(self, filters=None, sort_by='created_at', sort_order='DESC', fields=None):
         """
         Get all tasks with optional filtering and sorting
         
@@ -28,41 +135,41 @@ class TaskService:
             filters (dict): Dictionary of filter conditions
             sort_by (str): Field to sort by
             sort_order (str): 'ASC' or 'DESC'
+            fields (iterable, optional): Columns to return, all columns if omitted
             
         Returns:
             list: List of tasks as dictionaries
         """
-        query = "SELECT * FROM tasks"
+        # Never interpolate anything outside the whitelist into the SQL
+        if sort_by not in ALLOWED_SORT_FIELDS:
+            sort_by = 'created_at'
+        if sort_order not in ALLOWED_SORT_ORDERS:
+            sort_order = 'DESC'
+        # Unknown columns are dropped, and the projection is normalized to table order
+        if fields:
+            fields = tuple(column for column in TASK_COLUMNS if column in fields) or None
+        
+        filter_keys = []
         params = []
         
         # Apply filters if provided
         if filters:
-            filter_conditions = []
-            
             if 'status' in filters and filters['status']:
-                filter_conditions.append("status = ?")
+                filter_keys.append('status')
                 params.append(filters['status'])
             
-            if 'priority' in filters and filters['priority']:
-                filter_conditions.append("priority = ?")
+            if filters.get('priority') is not None:
+                filter_keys.append('priority')
                 params.append(filters['priority'])
             
-            if 'search' in filters and filters['search']:
-                filter_conditions.append("(title LIKE ? OR description LIKE ?)")
-                search_term = f"%{filters['search']}%"
-                params.append(search_term)
-                params.append(search_term)
-            
-            if filter_conditions:
-                query += " WHERE " + " AND ".join(filter_conditions)
+            if 'search' in filters and filters['search'] and filters['search'].strip():
+                filter_keys.append('search')
+                params.append(_fts_query(filters['search']))
         
-        # Apply sorting
-        query += f" ORDER BY {sort_by} {sort_order}"
+        query = _build_list_query(tuple(filter_keys), sort_by, sort_order, fields)
         
         try:
-            tasks = self.db_manager.execute_query(query, params)
-            # Convert Row objects to dictionaries
-            return [dict(task) for task in tasks]
+            return self.db_manager.query_all(query, params)
         except Exception as e:
             logger.error(f"Error fetching tasks: {e}")
             return []
@@ -77,10 +184,8 @@ class TaskService:
         Returns:
             dict: Task data or None if not found
         """
-        query = "SELECT * FROM tasks WHERE id = ?"
         try:
-            task = self.db_manager.execute_query(query, (task_id,), fetch_all=False)
-            return dict(task) if task else None
+            return self.db_manager.query_one(GET_TASK_QUERY, (task_id,))
         except Exception as e:
             logger.error(f"Error fetching task {task_id}: {e}")
             return None
@@ -94,18 +199,17 @@ class TaskService:
             
         Returns:
             dict: Created task data or None if failed
+            
+        Raises:
+            TimeoutError: The write could not start in time and was cancelled
         """
         if not task_data.get('title'):
             logger.warning("Attempted to create task without title")
             return None
         
-        task_id = str(uuid.uuid4())
-        now = datetime.now().isoformat()
+        task_id = uuid.uuid4().hex
+        now = _timestamp()
         
-        query = '''
-        INSERT INTO tasks (id, title, description, status, priority, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        '''
         params = (
             task_id,
             task_data.get('title'),
@@ -117,7 +221,8 @@ class TaskService:
         )
         
         try:
-            self.db_manager.execute_query(query, params, fetch_all=False, commit=True)
+            self.write_batcher.submit(INSERT_TASK_QUERY, params).get(timeout=WRITE_TIMEOUT)
+            self._invalidate_stats()
             
             # Return the created task
             return {
@@ -129,10 +234,50 @@ class TaskService:
                 "created_at": now,
                 "updated_at": now
             }
+        except TimeoutError as e:
+            logger.error(f"Timed out creating task: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error creating task: {e}")
             return None
     
+    def bulk_create(self, tasks_data):
+        """
+        Create many tasks in a single transaction
+        
+        Args:
+            tasks_data (list): List of task data dicts
+            
+        Returns:
+            list: Created tasks, or None if any task is invalid or the insert failed
+        """
+        if not tasks_data or any(not task_data.get('title') for task_data in tasks_data):
+            logger.warning("Attempted to bulk create tasks without titles")
+            return None
+        
+        now = _timestamp()
+        tasks = [
+            {
+                "id": uuid.uuid4().hex,
+                "title": task_data.get('title'),
+                "description": task_data.get('description', ''),
+                "status": task_data.get('status', 'pending'),
+                "priority": task_data.get('priority', 1),
+                "created_at": now,
+                "updated_at": now
+            }
+            for task_data in tasks_data
+        ]
+        
+        try:
+            rows = [tuple(task[column] for column in TASK_COLUMNS) for task in tasks]
+            self.db_manager.execute_many(INSERT_TASK_QUERY, rows)
+            self._invalidate_stats()
+            return tasks
+        except Exception as e:
+            logger.error(f"Error bulk creating tasks: {e}")
+            return None
+    
     def update_task(self, task_id, task_data):
         """
         Update an existing task
@@ -143,13 +288,10 @@ class TaskService:
             
         Returns:
             dict: Updated task data or None if failed
+            
+        Raises:
+            TimeoutError: The write could not start in time and was cancelled
         """
-        # Check if task exists
-        existing_task = self.get_task_by_id(task_id)
-        if not existing_task:
-            logger.warning(f"Attempted to update non-existent task: {task_id}")
-            return None
-        
         # Build update query
         update_fields = []
         params = []
@@ -161,23 +303,27 @@ class TaskService:
         
         if not update_fields:
             logger.warning(f"No valid fields to update for task: {task_id}")
-            return existing_task
+            return self.get_task_by_id(task_id)
         
-        # THIS IS THE BUG: The updated_at field is missing from the update query!
-        # Correct version would include:
-        # update_fields.append("updated_at = ?")
-        # now = datetime.now().isoformat()
-        # params.append(now)
+        # Set in the statement itself rather than by a trigger, since RETURNING
+        # does not reflect changes made by AFTER triggers
+        update_fields.append(f"updated_at = {SQL_NOW}")
         
         params.append(task_id)  # For the WHERE clause
         
-        query = f"UPDATE tasks SET {', '.join(update_fields)} WHERE id = ?"
+        # RETURNING hands back the updated row, so no existence check or re-read is needed
+        query = f"UPDATE tasks SET {', '.join(update_fields)} WHERE id = ? RETURNING {TASK_RETURNING}"
         
         try:
-            self.db_manager.execute_query(query, params, fetch_all=False, commit=True)
-            
-            # Get and return the updated task
-            return self.get_task_by_id(task_id)
+            rows = self.write_batcher.submit(query, params).get(timeout=WRITE_TIMEOUT)
+            if not rows:
+                logger.warning(f"Attempted to update non-existent task: {task_id}")
+                return None
+            self._invalidate_stats()
+            return rows[0]
+        except TimeoutError as e:
+            logger.error(f"Timed out updating task {task_id}: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error updating task {task_id}: {e}")
             return None
@@ -192,62 +338,96 @@ class TaskService:
         Returns:
             bool: True if successful, False otherwise
         """
-        # Check if task exists
-        existing_task = self.get_task_by_id(task_id)
-        if not existing_task:
-            logger.warning(f"Attempted to delete non-existent task: {task_id}")
-            return False
-        
-        query = "DELETE FROM tasks WHERE id = ?"
-        
         try:
-            self.db_manager.execute_query(query, (task_id,), fetch_all=False, commit=True)
+            # The affected row count tells us whether the task existed
+            if not self.db_manager.execute(DELETE_TASK_QUERY, (task_id,)):
+                logger.warning(f"Attempted to delete non-existent task: {task_id}")
+                return False
+            self._invalidate_stats()
             logger.info(f"Deleted task: {task_id}")
             return True
         except Exception as e:
             logger.error(f"Error deleting task {task_id}: {e}")
             return False
     
-    def get_task_stats(self):
+    def get_data_version(self):
         """
-        Get statistics about tasks
+        Get the current version of the task data
         
         Returns:
-            dict: Task statistics
+            str: Version that changes on every write from any process, or None if it could not be read
         """
-        # Get total count
-        total_query = "SELECT COUNT(*) as count FROM tasks"
-        
-        # Get counts by status
-        status_query = """
-        SELECT status, COUNT(*) as count 
-        FROM tasks 
-        GROUP BY status
+        try:
+            return self.db_manager.data_version()
+        except Exception as e:
+            logger.error(f"Error reading data version: {e}")
+            return None
+    
+    def _cached_stats(self, version):
+        """Return the cached stats if they are for this data version and within the TTL, else None"""
+        cached = self._stats_cache
+        if cached and cached[1] == version and time.monotonic() - cached[0] < self._stats_ttl:
+            return cached[2]
+        return None
+    
+    def get_task_stats(self, version=None):
         """
+        Get statistics about tasks, served from a short-lived cache
         
-        # Get counts by priority
-        priority_query = """
-        SELECT priority, COUNT(*) as count 
-        FROM tasks 
-        GROUP BY priority
-        ORDER BY priority
+        Args:
+            version (str, optional): Data version the caller already read, read here if omitted
+            
+        Returns:
+            dict: Task statistics
         """
+        if version is None:
+            version = self.get_data_version()
         
-        try:
-            # Execute queries
-            total_result = self.db_manager.execute_query(total_query, fetch_all=False)
-            status_results = self.db_manager.execute_query(status_query)
-            priority_results = self.db_manager.execute_query(priority_query)
+        # Cache hits never take the lock
+        stats = self._cached_stats(version)
+        if stats is not None:
+            return stats
+        
+        # Holding the lock while recomputing collapses concurrent misses into one query
+        with self._stats_lock:
+            stats = self._cached_stats(version)
+            if stats is not None:
+                return stats
             
-            # Process results
-            total = total_result['count'] if total_result else 0
-            status_stats = {row['status']: row['count'] for row in status_results}
-            priority_stats = {row['priority']: row['count'] for row in priority_results}
+            token = self._stats_pending = object()
+            computed_at = time.monotonic()
+            stats = self._query_task_stats()
+            # Only cache if no write invalidated the stats while they were being computed
+            if stats is not None and version is not None and self._stats_pending is token:
+                self._stats_cache = (computed_at, version, stats)
+        
+        if stats is None:
+            return {
+                "total": 0,
+                "by_status": {},
+                "by_priority": {},
+                "avg_priority": 0
+            }
+        return stats
+    
+    def _query_task_stats(self):
+        """Run the stats query, returning None on failure"""
+        try:
+            # All counting is done by SQLite, only the aggregated rows are fetched
+            rows = self.db_manager.query_all(TASK_STATS_QUERY)
             
-            # Calculate average priority
-            avg_priority_query = "SELECT AVG(priority) as avg_priority FROM tasks"
-            avg_priority_result = self.db_manager.execute_query(avg_priority_query, fetch_all=False)
-            avg_priority = avg_priority_result['avg_priority'] if avg_priority_result else 0
+            # Split the tagged rows back into their aggregates in one pass
+            total, avg_priority = 0, 0
+            status_stats, priority_stats = {}, {}
+            for row in rows:
+                if row['kind'] == 'status':
+                    status_stats[row['key']] = row['count']
+                elif row['kind'] == 'priority':
+                    priority_stats[row['key']] = row['count']
+                else:
+                    total = row['count']
+                    # AVG() is NULL on an empty table
+                    avg_priority = row['avg_priority'] or 0
             
             return {
                 "total": total,
@@ -257,13 +437,8 @@ class TaskService:
             }
         except Exception as e:
             logger.error(f"Error getting task stats: {e}")
-            return {
-                "total": 0,
-                "by_status": {},
-                "by_priority": {},
-                "avg_priority": 0
-            }
+            return None
         
 if __name__ == "__main__":
-    task_service = TaskService()
+    task_service = TaskService.instance()
     
\ No newline at end of file
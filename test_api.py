@@ -2,19 +2,25 @@
 
 import unittest
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
 import sys
 import subprocess
-import time
 import signal
 from multiprocessing import Process
+from testing_utils import wait_ready
 
 API_URL = "http://localhost:5000"
 
 class TestTaskAPI(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
+        # Clean database for testing before the server opens it
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(f'database/tasks.db{suffix}'):
+                os.remove(f'database/tasks.db{suffix}')
+        
         # Start the Flask server in a separate process
         cls.server_process = subprocess.Popen(
             ["python", "app.py"],
@@ -22,18 +28,25 @@ class TestTaskAPI(unittest.TestCase):
             stderr=subprocess.PIPE
         )
         
-        # Give the server some time to start
-        time.sleep(2)
+        # Wait until the server accepts requests
+        wait_ready(f"{API_URL}/api/tasks")
         
-        # Clean database for testing
-        if os.path.exists('database/tasks.db'):
-            os.remove('database/tasks.db')
+        # Reuse keep-alive connections to the API across tests
+        cls.session = requests.Session()
+        cls.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
     
     @classmethod
     def tearDownClass(cls):
+        cls.session.close()
+        
         # Terminate the server process
         cls.server_process.terminate()
         cls.server_process.wait()
+        
+        # Remove backups created by the tests
+        for name in os.listdir('database'):
+            if name.startswith('backup_'):
+                os.remove(os.path.join('database', name))
     
     def test_1_create_task(self):
         """Test creating a new task"""
@@ -44,7 +57,7 @@ class TestTaskAPI(unittest.TestCase):
             "priority": 3
         }
         
-        response = requests.post(f"{API_URL}/api/tasks", json=task_data)
+        response = self.session.post(f"{API_URL}/api/tasks", json=task_data)
         self.assertEqual(response.status_code, 201)
         
         # Verify response data
@@ -55,12 +68,13 @@ class TestTaskAPI(unittest.TestCase):
         self.assertEqual(data["priority"], task_data["priority"])
         self.assertIn("id", data)
         
-        # Save task ID for later tests
+        # Save task ID and timestamp for later tests
         self.__class__.task_id = data["id"]
+        self.__class__.updated_at = data["updated_at"]
     
     def test_2_get_all_tasks(self):
         """Test retrieving all tasks"""
-        response = requests.get(f"{API_URL}/api/tasks")
+        response = self.session.get(f"{API_URL}/api/tasks")
         self.assertEqual(response.status_code, 200)
         
         data = response.json()
@@ -69,7 +83,7 @@ class TestTaskAPI(unittest.TestCase):
     
     def test_3_get_task_by_id(self):
         """Test retrieving a single task by ID"""
-        response = requests.get(f"{API_URL}/api/tasks/{self.__class__.task_id}")
+        response = self.session.get(f"{API_URL}/api/tasks/{self.__class__.task_id}")
         self.assertEqual(response.status_code, 200)
         
         data = response.json()
@@ -83,17 +97,18 @@ class TestTaskAPI(unittest.TestCase):
             "status": "in_progress"
         }
         
-        response = requests.put(f"{API_URL}/api/tasks/{self.__class__.task_id}", json=update_data)
+        response = self.session.put(f"{API_URL}/api/tasks/{self.__class__.task_id}", json=update_data)
         self.assertEqual(response.status_code, 200)
         
         data = response.json()
         self.assertEqual(data["title"], update_data["title"])
         self.assertEqual(data["status"], update_data["status"])
         self.assertEqual(data["description"], "This is a test task")  # Unchanged field
+        self.assertGreater(data["updated_at"], self.__class__.updated_at)  # Refreshed on update
     
     def test_5_get_stats(self):
         """Test getting task statistics"""
-        response = requests.get(f"{API_URL}/api/stats")
+        response = self.session.get(f"{API_URL}/api/stats")
         self.assertEqual(response.status_code, 200)
         
         data = response.json()
@@ -107,16 +122,16 @@ class TestTaskAPI(unittest.TestCase):
     
     def test_6_delete_task(self):
         """Test deleting a task"""
-        response = requests.delete(f"{API_URL}/api/tasks/{self.__class__.task_id}")
+        response = self.session.delete(f"{API_URL}/api/tasks/{self.__class__.task_id}")
         self.assertEqual(response.status_code, 200)
         
         # Verify the task is actually deleted
-        response = requests.get(f"{API_URL}/api/tasks/{self.__class__.task_id}")
+        response = self.session.get(f"{API_URL}/api/tasks/{self.__class__.task_id}")
         self.assertEqual(response.status_code, 404)
     
     def test_7_get_nonexistent_task(self):
         """Test retrieving a non-existent task"""
-        response = requests.get(f"{API_URL}/api/tasks/nonexistent-id")
+        response = self.session.get(f"{API_URL}/api/tasks/nonexistent-id")
         self.assertEqual(response.status_code, 404)
     
     def test_8_create_task_missing_title(self):
@@ -126,8 +141,102 @@ class TestTaskAPI(unittest.TestCase):
             "status": "pending"
         }
         
-        response = requests.post(f"{API_URL}/api/tasks", json=task_data)
+        response = self.session.post(f"{API_URL}/api/tasks", json=task_data)
         self.assertEqual(response.status_code, 400)
+    
+    def test_8_create_task_invalid_json(self):
+        """Test creating a task with a malformed JSON body (should fail)"""
+        response = self.session.post(
+            f"{API_URL}/api/tasks",
+            data="{bad",
+            headers={"Content-Type": "application/json"}
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_9_bulk_create_tasks(self):
+        """Test creating several tasks in one request"""
+        tasks_data = [
+            {"title": "Bulk Task 1", "priority": 2},
+            {"title": "Bulk Task 2", "status": "completed"}
+        ]
+        
+        response = self.session.post(f"{API_URL}/api/tasks/bulk", json=tasks_data)
+        self.assertEqual(response.status_code, 201)
+        
+        data = response.json()
+        self.assertEqual([task["title"] for task in data], ["Bulk Task 1", "Bulk Task 2"])
+        self.assertEqual(data[1]["status"], "completed")
+        
+        # A task without a title rejects the whole batch
+        response = self.session.post(f"{API_URL}/api/tasks/bulk", json=[{"title": "Ok"}, {"status": "pending"}])
+        self.assertEqual(response.status_code, 400)
+    
+    def test_9_get_tasks_fields(self):
+        """Test projecting the task list onto selected columns"""
+        self.session.post(f"{API_URL}/api/tasks", json={"title": "Projected Task", "description": "Hidden"})
+        
+        # Columns come back in table order, and unknown columns are ignored
+        response = self.session.get(f"{API_URL}/api/tasks", params={"fields": "title,id,bogus"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertGreaterEqual(len(data), 1)
+        for task in data:
+            self.assertEqual(list(task), ["id", "title"])
+        
+        # A projection of only unknown columns falls back to every column
+        response = self.session.get(f"{API_URL}/api/tasks", params={"fields": "bogus"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.json()[0]),
+            {"id", "title", "description", "status", "priority", "created_at", "updated_at"}
+        )
+    
+    def test_9_get_tasks_not_modified(self):
+        """Test that an unchanged task list returns 304 for a matching ETag"""
+        response = self.session.get(f"{API_URL}/api/tasks")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers.get("ETag")
+        self.assertIsNotNone(etag)
+        
+        response = self.session.get(f"{API_URL}/api/tasks", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        
+        # The ETag also matches inside a list of candidates
+        response = self.session.get(f"{API_URL}/api/tasks", headers={"If-None-Match": f'"stale", {etag}'})
+        self.assertEqual(response.status_code, 304)
+
+    def test_9_search_tasks(self):
+        """Test that search matches word prefixes and follows title changes"""
+        response = self.session.post(f"{API_URL}/api/tasks", json={"title": "Searchable Gadget"})
+        self.assertEqual(response.status_code, 201)
+        task_id = response.json()["id"]
+        
+        def search(text):
+            response = self.session.get(f"{API_URL}/api/tasks", params={"search": text})
+            self.assertEqual(response.status_code, 200)
+            return [task["id"] for task in response.json()]
+        
+        # Words match by prefix, not as arbitrary substrings
+        self.assertIn(task_id, search("gad"))
+        self.assertIn(task_id, search("search gadget"))
+        self.assertNotIn(task_id, search("adget"))
+        
+        # The old title leaves the index when it is updated
+        response = self.session.put(f"{API_URL}/api/tasks/{task_id}", json={"title": "Renamed Widget"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(task_id, search("gadget"))
+        self.assertIn(task_id, search("widg"))
+        
+        # And the task leaves it entirely when deleted
+        response = self.session.delete(f"{API_URL}/api/tasks/{task_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(task_id, search("widg"))
+
+    def test_9_start_backup(self):
+        """Test that a backup is started in the background"""
+        response = self.session.post(f"{API_URL}/api/system/backup")
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.json()["path"].startswith("database/backup_"))
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,8 +1,8 @@
 # test_frontend.py - Frontend Integration Tests
 import unittest
 import subprocess
-import time
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
 from selenium import webdriver
@@ -13,13 +13,24 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException
+from testing_utils import wait_ready
 
 API_URL = "http://localhost:5000/api"
 FRONTEND_URL = "http://localhost:8501"
+EXPANDER_SELECTOR = "div[data-testid='stExpander']"
+EXPANDER_HEADER_XPATH = (
+    "//div[@data-testid='stExpander']"
+    "//span[contains(@class,'streamlit-expanderHeader') and contains(.,'{title}')]"
+)
 
 class TestStreamlitFrontend(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
+        # Clean database for testing before the server opens it
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(f'database/tasks.db{suffix}'):
+                os.remove(f'database/tasks.db{suffix}')
+        
         # Start the Flask server in a separate process
         cls.api_process = subprocess.Popen(
             ["python", "app.py"],
@@ -34,12 +45,13 @@ class TestStreamlitFrontend(unittest.TestCase):
             stderr=subprocess.PIPE
         )
         
-        # Give the servers some time to start
-        time.sleep(5)
+        # Wait until both servers accept requests
+        wait_ready(f"{API_URL}/tasks")
+        wait_ready(FRONTEND_URL)
         
-        # Clean database for testing
-        if os.path.exists('database/tasks.db'):
-            os.remove('database/tasks.db')
+        # Reuse keep-alive connections to the API across tests
+        cls.session = requests.Session()
+        cls.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
         
         # Setup selenium webdriver
         chrome_options = Options()
@@ -51,10 +63,11 @@ class TestStreamlitFrontend(unittest.TestCase):
             service=Service(ChromeDriverManager().install()),
             options=chrome_options
         )
-        cls.driver.implicitly_wait(10)
     
     @classmethod
     def tearDownClass(cls):
+        cls.session.close()
+        
         # Close the browser
         cls.driver.quit()
         
@@ -74,20 +87,32 @@ class TestStreamlitFrontend(unittest.TestCase):
             "priority": 2
         }
         
-        response = requests.post(f"{API_URL}/api/tasks", json=task_data)
+        response = self.session.post(f"{API_URL}/tasks", json=task_data)
         data = response.json()
         self.task_id = data["id"]
         
         # Navigate to the Streamlit app
         self.driver.get(FRONTEND_URL)
         
-        # Allow time for the app to load
-        time.sleep(3)
+        # Wait for the app to render
+        WebDriverWait(self.driver, 10).until(
+            EC.presence_of_element_located((By.TAG_NAME, "h1"))
+        )
+    
+    def _task_listed(self, title, timeout=5):
+        """Wait for a task expander whose header contains title"""
+        wait = WebDriverWait(self.driver, timeout)
+        try:
+            wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, EXPANDER_SELECTOR)))
+            wait.until(EC.presence_of_element_located((By.XPATH, EXPANDER_HEADER_XPATH.format(title=title))))
+            return True
+        except TimeoutException:
+            return False
     
     def tearDown(self):
         # Clean up the test task
         try:
-            requests.delete(f"{API_URL}/api/tasks/{self.task_id}")
+            self.session.delete(f"{API_URL}/tasks/{self.task_id}")
         except:
             pass
     
@@ -102,21 +127,8 @@ class TestStreamlitFrontend(unittest.TestCase):
         tabs = self.driver.find_elements(By.CSS_SELECTOR, "button[role='tab']")
         tabs[1].click()  # Click the "Manage Tasks" tab
         
-        # Wait for the task list to load
-        time.sleep(2)
-        
-        # Find task expanders
-        expanders = self.driver.find_elements(By.CSS_SELECTOR, "div[data-testid='stExpander']")
-        
         # Check if our test task is displayed
-        found = False
-        for expander in expanders:
-            header_text = expander.find_element(By.CSS_SELECTOR, "span.streamlit-expanderHeader").text
-            if "Test Frontend Task" in header_text:
-                found = True
-                break
-        
-        self.assertTrue(found, "Test task not found in the tasks list")
+        self.assertTrue(self._task_listed("Test Frontend Task"), "Test task not found in the tasks list")
     
     def test_3_create_new_task(self):
         """Test creating a new task through the UI"""
@@ -125,18 +137,18 @@ class TestStreamlitFrontend(unittest.TestCase):
         tabs[1].click()  # Click the "Manage Tasks" tab
         
         # Fill out the create task form
-        title_input = self.driver.find_element(By.CSS_SELECTOR, "input[aria-label='Title']")
+        title_input = WebDriverWait(self.driver, 5).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "input[aria-label='Title']"))
+        )
         title_input.send_keys("UI Created Task")
         
         desc_input = self.driver.find_element(By.CSS_SELECTOR, "textarea[aria-label='Description']")
         desc_input.send_keys("This task was created through the UI")
         
         # Find form submit button and click it
-        create_buttons = self.driver.find_elements(By.CSS_SELECTOR, "button[kind='primaryFormSubmit']")
-        for button in create_buttons:
-            if button.text == "Create Task":
-                button.click()
-                break
+        self.driver.find_element(
+            By.XPATH, "//button[@kind='primaryFormSubmit' and normalize-space(.)='Create Task']"
+        ).click()
         
         # Wait for success message
         try:
@@ -149,39 +161,39 @@ class TestStreamlitFrontend(unittest.TestCase):
         
         self.assertTrue(success, "Success message not found after creating task")
         
-        # Check if the new task appears in the list
-        time.sleep(3)  # Wait for page to refresh
-        
-        expanders = self.driver.find_elements(By.CSS_SELECTOR, "div[data-testid='stExpander']")
-        
-        found = False
-        for expander in expanders:
-            header_text = expander.find_element(By.CSS_SELECTOR, "span.streamlit-expanderHeader").text
-            if "UI Created Task" in header_text:
-                found = True
-                break
-        
-        self.assertTrue(found, "Newly created task not found in the tasks list")
+        # Check if the new task appears in the list once the page refreshes
+        self.assertTrue(self._task_listed("UI Created Task"), "Newly created task not found in the tasks list")
     
     def test_4_dashboard_shows_stats(self):
         """Test that the dashboard shows task statistics"""
-        # Create a couple more tasks for better stats
-        requests.post(f"{API_URL}/api/tasks", json={"title": "Dashboard Test 1", "status": "in_progress"})
-        requests.post(f"{API_URL}/api/tasks", json={"title": "Dashboard Test 2", "status": "completed"})
+        # Create a couple more tasks for better stats in a single request
+        self.session.post(f"{API_URL}/tasks/bulk", json=[
+            {"title": "Dashboard Test 1", "status": "in_progress"},
+            {"title": "Dashboard Test 2", "status": "completed"}
+        ])
         
         # Navigate to Dashboard tab
         tabs = self.driver.find_elements(By.CSS_SELECTOR, "button[role='tab']")
         tabs[0].click()  # Click the "Dashboard" tab
         
-        # Wait for stats to load
-        time.sleep(2)
+        wait = WebDriverWait(self.driver, 5)
         
         # Check for total tasks metric
-        metric_elements = self.driver.find_elements(By.CSS_SELECTOR, "div[data-testid='stMetric']")
+        try:
+            metric_elements = wait.until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div[data-testid='stMetric']"))
+            )
+        except TimeoutException:
+            metric_elements = []
         self.assertTrue(len(metric_elements) > 0, "No metrics found on dashboard")
         
         # Check for charts
-        chart_elements = self.driver.find_elements(By.CSS_SELECTOR, "div[data-testid='stChart']")
+        try:
+            chart_elements = wait.until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div[data-testid='stChart']"))
+            )
+        except TimeoutException:
+            chart_elements = []
         self.assertTrue(len(chart_elements) > 0, "No charts found on dashboard")
 
 if __name__ == "__main__":
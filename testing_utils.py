@@ -0,0 +1,15 @@
+# testing_utils.py - Shared helpers for the integration tests
+
+import time
+import requests
+
+def wait_ready(url, timeout=15):
+    """Poll url until the server answers or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=0.2)
+            return
+        except requests.exceptions.RequestException:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout}s")
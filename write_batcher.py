@@ -0,0 +1,143 @@
+# write_batcher.py - Coalesces concurrent write statements into shared transactions
+
+import time
+import queue
+import sqlite3
+import threading
+from database.database_manager import fetch_dicts
+from logging_utils import get_logger
+
+logger = get_logger("write_batcher")
+
+# Maximum number of statements committed in a single transaction
+BATCH_MAX = 64
+# How long to wait for more statements once a batch has started
+BATCH_WAIT_MS = 5
+
+class PendingWrite:
+    """A submitted write statement whose result is set once its batch commits"""
+    
+    def __init__(self, query, params):
+        self.query = query
+        self.params = params
+        self._done = threading.Event()
+        self._rows = None
+        self._error = None
+        # queued -> running, or queued -> cancelled; guarded so the two transitions cannot race
+        self._state = "queued"
+        self._state_lock = threading.Lock()
+    
+    def start(self):
+        """Mark the statement as executing, returning False if it was cancelled while queued"""
+        with self._state_lock:
+            if self._state != "queued":
+                return False
+            self._state = "running"
+            return True
+    
+    def cancel(self):
+        """Cancel the statement if it has not started executing, returning whether it was cancelled"""
+        with self._state_lock:
+            if self._state != "queued":
+                return False
+            self._state = "cancelled"
+            return True
+    
+    def set_result(self, rows):
+        self._rows = rows
+        self._done.set()
+    
+    def set_exception(self, error):
+        self._error = error
+        self._done.set()
+    
+    def get(self, timeout=None):
+        """
+        Wait for the statement to be committed
+        
+        If the timeout expires before the statement starts executing, it is
+        cancelled and never runs, so a TimeoutError always means nothing was written.
+        
+        Args:
+            timeout (float, optional): Seconds to wait before giving up
+            
+        Returns:
+            list: Rows produced by the statement (e.g. via RETURNING) as dicts
+        """
+        if not self._done.wait(timeout):
+            if self.cancel():
+                raise TimeoutError(f"Write not started within {timeout} seconds and was cancelled")
+            # Already executing inside a transaction that holds the write lock, so it finishes shortly
+            self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._rows
+
+class WriteBatcher:
+    def __init__(self, db_manager, batch_max=BATCH_MAX, batch_wait_ms=BATCH_WAIT_MS):
+        """Start a background writer that commits submitted statements in batches"""
+        self.db_manager = db_manager
+        self.batch_max = batch_max
+        self.batch_wait = batch_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+        self._thread.start()
+    
+    def submit(self, query, params=()):
+        """
+        Queue a write statement for the next batch
+        
+        Args:
+            query (str): SQL statement
+            params (tuple): Statement parameters
+            
+        Returns:
+            PendingWrite: Handle to wait on for the committed result
+        """
+        pending = PendingWrite(query, params)
+        self._queue.put(pending)
+        return pending
+    
+    def _run(self):
+        """Collect up to batch_max statements, waiting at most batch_wait after the first"""
+        while True:
+            batch = [self._queue.get()]
+            # One deadline per batch, so a steady trickle of writes cannot keep it open
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_max:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+    
+    def _flush(self, batch):
+        """Execute a batch in one transaction, then publish each statement's result"""
+        results = []
+        try:
+            with self.db_manager.transaction() as conn:
+                for pending in batch:
+                    # Statements cancelled by a timed out caller are skipped
+                    if not pending.start():
+                        continue
+                    # A failing statement usually rolls back only itself, and the rest of the batch still commits
+                    try:
+                        results.append((pending, fetch_dicts(conn.execute(pending.query, pending.params)), None))
+                    except sqlite3.Error as e:
+                        # Some errors (disk full, I/O, busy, RAISE(ROLLBACK)) roll back the whole
+                        # transaction; then nothing in the batch was written, so fail all of it
+                        if not conn.in_transaction:
+                            raise
+                        results.append((pending, None, e))
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} writes failed: {e}")
+            for pending in batch:
+                pending.set_exception(e)
+            return
+        
+        for pending, rows, error in results:
+            if error is not None:
+                logger.error(f"Database error: {error}")
+                pending.set_exception(error)
+            else:
+                pending.set_result(rows)
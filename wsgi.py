@@ -0,0 +1,10 @@
+# wsgi.py - WSGI entry point for running the API under gunicorn with gevent workers
+
+# Patch the standard library before anything else is imported so that sockets,
+# sleeps, locks and threads cooperate with the gevent event loop. Regular file I/O
+# and sqlite3 calls are NOT patched: they block every greenlet in the worker while
+# they run, including up to BUSY_TIMEOUT_MS while waiting on a locked database.
+from gevent import monkey
+monkey.patch_all()
+
+from app import app